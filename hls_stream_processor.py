@@ -8,16 +8,19 @@ import threading
 from queue import Queue, Full
 import cv2
 import logging
+from pyav_capture import frame_to_ndarray
 
 logging.basicConfig(level=logging.INFO)
 
 class HLSStreamProcessor:
-    def __init__(self, hls_url, max_queue_size=0):
+    def __init__(self, hls_url, max_queue_size=0, pixel_format="bgr24"):
         """
         :param hls_url: The URL of the HLS media playlist (or master, if you handle variant logic).
         :param max_queue_size: Optional maximum size of the segment queue (0 = unlimited).
+        :param pixel_format: Format of the frames returned by retrieve()/read(), "bgr24" or "gray".
         """
         self.hls_url = hls_url
+        self.pixel_format = pixel_format
         self.etag = None
         self.last_modified = None
         self.last_processed_segment = None
@@ -31,6 +34,8 @@ class HLSStreamProcessor:
 
         # Internal generator reference for read() usage
         self._frame_generator_iter = None
+        # Last frame returned by grab(), converted lazily by retrieve()
+        self._grabbed_frame_info = None
 
         # Thread reference
         self._downloader_thread = None
@@ -257,9 +262,10 @@ class HLSStreamProcessor:
                 frame_count = 0
 
                 for frame in container.decode(video=0):
-                    ndarray = frame.to_ndarray(format="bgr24")
+                    # Keep the decoded av.VideoFrame; retrieve() only converts
+                    # the frames the caller actually needs.
                     yield {
-                        "frame": ndarray,
+                        "frame": frame,
                         "fps": fps,
                         "frame_number_in_chunk": frame_count,
                         "chunk_name": chunk_url,
@@ -301,6 +307,38 @@ class HLSStreamProcessor:
         # Create an iterator from the frame generator for read().
         self._frame_generator_iter = self.frame_generator()
 
+    def grab(self):
+        """
+        Mimics cv2.VideoCapture.grab(): advances to the next decoded frame
+        without converting it to an ndarray.
+          :return: True if a frame was grabbed, False otherwise
+        """
+        self._grabbed_frame_info = None
+        if self.stop_event.is_set() or self._frame_generator_iter is None:
+            return False
+
+        try:
+            self._grabbed_frame_info = next(self._frame_generator_iter)
+            return True
+        except StopIteration:
+            # Generator exhausted or stop_event triggered
+            return False
+        except Exception as e:
+            logging.error(f"Error reading next frame: {e}")
+            return False
+
+    def retrieve(self):
+        """
+        Mimics cv2.VideoCapture.retrieve(): converts the last grabbed frame.
+          :return: (ret, frame_info) as described in read()
+        """
+        if self._grabbed_frame_info is None:
+            return False, None
+
+        frame_info = dict(self._grabbed_frame_info)
+        frame_info["frame"] = frame_to_ndarray(frame_info["frame"], self.pixel_format)
+        return True, frame_info
+
     def read(self):
         """
         Mimics cv2.VideoCapture.read() style:
@@ -311,18 +349,18 @@ class HLSStreamProcessor:
 
         It will block momentarily if no data is available yet, but not forever.
         """
-        if self.stop_event.is_set() or self._frame_generator_iter is None:
+        if not self.grab():
             return False, None
+        return self.retrieve()
 
-        try:
-            frame_info = next(self._frame_generator_iter)
-            return True, frame_info
-        except StopIteration:
-            # Generator exhausted or stop_event triggered
-            return False, None
-        except Exception as e:
-            logging.error(f"Error reading next frame: {e}")
-            return False, None
+    def get(self, prop_id):
+        """
+        Mimics cv2.VideoCapture.get() for the properties we know about.
+        Only cv2.CAP_PROP_FPS of the last grabbed frame is supported.
+        """
+        if prop_id == cv2.CAP_PROP_FPS and self._grabbed_frame_info is not None:
+            return self._grabbed_frame_info["fps"]
+        return 0.0
 
     def release(self):
         """
@@ -0,0 +1,128 @@
+import logging
+import av
+import cv2
+import numpy as np
+from av.codec.context import Flags
+
+try:
+    from av.codec.hwaccel import HWAccel
+except ImportError:
+    # Hardware decoding was added in PyAV 14
+    HWAccel = None
+
+# Decode errors in a row after which grab() gives up and reports the end of the source
+MAX_CONSECUTIVE_DECODE_ERRORS = 10
+
+# 8-bit pixel formats whose first plane is the full resolution luma (Y) plane
+LUMA_PLANE_FORMATS = {"yuv420p", "yuvj420p", "yuv422p", "yuvj422p", "yuv444p", "yuvj444p",
+                      "yuv440p", "yuvj440p", "yuv411p", "nv12", "nv21"}
+
+
+def frame_to_ndarray(frame, pixel_format="bgr24"):
+    """
+    Converts a decoded av.VideoFrame to an ndarray. For "gray", YUV frames hand out a
+    view of their Y plane instead of going through swscale (which costs as much as bgr24).
+    The luma keeps its limited (16-235) range: fine for pHash and average hash, but not
+    for hashes that have to match keyframes decoded to BGR bit for bit (Marr-Hildreth, radial).
+    """
+    if pixel_format == "gray" and frame.format.name in LUMA_PLANE_FORMATS:
+        plane = frame.planes[0]
+        luma = np.frombuffer(plane, np.uint8).reshape(plane.height, plane.line_size)
+        return luma[:, :frame.width]
+    return frame.to_ndarray(format=pixel_format)
+
+
+class PyAVCapture:
+    def __init__(self, source, hwaccel=None, options=None, pixel_format="bgr24", live=False):
+        """
+        :param source: Video file path or stream URL.
+        :param hwaccel: Optional FFmpeg hardware device type (e.g. "cuda", "vaapi").
+                        Decoding falls back to software if the device is not available.
+        :param options: Optional dictionary of FFmpeg options passed to av.open().
+        :param pixel_format: Format of the frames returned by retrieve(), "bgr24" or "gray".
+        :param live: Configure the decoder to output every frame as soon as it is decoded.
+        """
+        self.pixel_format = pixel_format
+        kwargs = {}
+        if hwaccel:
+            if HWAccel is None:
+                logging.warning(f"PyAV {av.__version__} has no hardware decoding support, ignoring hwaccel={hwaccel}")
+            else:
+                kwargs["hwaccel"] = HWAccel(device_type=hwaccel, allow_software_fallback=True)
+
+        self.container = av.open(source, options=options or {}, **kwargs)
+        if not self.container.streams.video:
+            self.container.close()
+            raise IOError(f"No video stream found in {source}")
+
+        self.stream = self.container.streams.video[0]
+        if live:
+            # Decoder options given to av.open() only reach the demuxer, so low_delay is set on the
+            # codec context itself. Frame threading would hold frames back, only use slice threads.
+            self.stream.codec_context.flags |= Flags.low_delay
+            self.stream.thread_type = "SLICE"
+        else:
+            # Let FFmpeg use frame and slice threading for software decoding
+            self.stream.thread_type = "AUTO"
+        self.fps = float(self.stream.average_rate) if self.stream.average_rate else 0.0
+
+        self._frame_iter = self.container.decode(self.stream)
+        self._grabbed_frame = None
+
+    def isOpened(self):
+        return self.container is not None
+
+    def grab(self):
+        """
+        Mimics cv2.VideoCapture.grab(): decodes the next frame but keeps it in
+        its native pixel format until retrieve() is called.
+        """
+        self._grabbed_frame = None
+        if self.container is None:
+            return False
+
+        for _ in range(MAX_CONSECUTIVE_DECODE_ERRORS):
+            try:
+                self._grabbed_frame = next(self._frame_iter)
+                return True
+            except StopIteration:
+                return False
+            except av.FFmpegError as av_err:
+                # The decode generator is finished once it raised: skip the bad packet and
+                # carry on with a new one, like cv2.VideoCapture does with corrupt frames
+                logging.error(f"PyAV error decoding frame: {av_err}")
+                self._frame_iter = self.container.decode(self.stream)
+        return False
+
+    def retrieve(self):
+        """
+        Mimics cv2.VideoCapture.retrieve(): converts the last grabbed frame to an ndarray in pixel_format.
+        """
+        if self._grabbed_frame is None:
+            return False, None
+        return True, frame_to_ndarray(self._grabbed_frame, self.pixel_format)
+
+    def read(self):
+        if not self.grab():
+            return False, None
+        return self.retrieve()
+
+    def get(self, prop_id):
+        """
+        Mimics cv2.VideoCapture.get() for the properties we know about.
+        """
+        if prop_id == cv2.CAP_PROP_FPS:
+            return self.fps
+        if prop_id == cv2.CAP_PROP_POS_MSEC and self._grabbed_frame is not None \
+                and self._grabbed_frame.pts is not None:
+            return float(self._grabbed_frame.pts * self._grabbed_frame.time_base) * 1000.0
+        return 0.0
+
+    def set(self, prop_id, value):
+        # FFmpeg options have to be given to av.open(), nothing can be changed afterwards
+        return False
+
+    def release(self):
+        if self.container is not None:
+            self.container.close()
+            self.container = None
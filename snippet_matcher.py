@@ -0,0 +1,138 @@
+from datetime import timedelta
+import numpy as np
+
+
+def pack_hashes(hashes):
+    """
+    Packs (N, hash_bytes) uint8 hashes into uint64 words so they are compared a machine word
+    at a time: an (N,) array for 8 byte hashes (pHash, average), (N, words) rows otherwise
+    (radial: 5, Marr-Hildreth: 9). Hashes are zero padded to a multiple of 8 bytes, which
+    doesn't change any distance.
+    """
+    hashes = np.ascontiguousarray(hashes, dtype=np.uint8)
+    padding = -hashes.shape[1] % 8
+    if padding:
+        hashes = np.pad(hashes, ((0, 0), (0, padding)))
+    words = hashes.view(np.uint64)
+    return words[:, 0] if words.shape[1] == 1 else words
+
+
+def hamming_distances(frame_hash, hashes):
+    """Bitwise Hamming distance between one hash and every row of an array of hashes."""
+    # np.bitwise_count uses the CPU popcount instructions (NumPy >= 2.0)
+    distances = np.bitwise_count(np.bitwise_xor(hashes, frame_hash))
+    return distances if distances.ndim == 1 else distances.sum(axis=1)
+
+
+class SnippetMatcher:
+    def __init__(self, known_hashes, frame_paths, match_threshold, time_window,
+                 image_min_duration, cooldown):
+        """
+        Matching state of every snippet, kept as parallel NumPy arrays (one entry per snippet)
+        so a sampled frame is checked against all snippets with a few vectorized operations.
+
+        :param known_hashes: List of (num_keyframes, hash_bytes) uint8 arrays, one per snippet.
+                             A snippet with a single keyframe is a single-image snippet.
+        :param frame_paths: List of keyframe paths per snippet; the last one gives the snippet length in frames.
+        :param match_threshold: Hamming distance (in bits) under which a frame matches a keyframe.
+        :param time_window: Seconds allowed to find the next keyframe of a multi-keyframe snippet.
+        :param image_min_duration: Seconds a single image has to be visible to be detected.
+        :param cooldown: Minimum seconds between two detections of the same snippet.
+        """
+        self.frame_paths = frame_paths
+        self.match_threshold = match_threshold
+        self.time_window = time_window
+        self.image_min_duration = image_min_duration
+        self.cooldown = cooldown
+
+        num_snippets = len(known_hashes)
+        self.num_keyframes = np.array([len(hashes) for hashes in known_hashes])
+        self.single_image = self.num_keyframes == 1
+
+        # Keyframes of all snippets packed into one contiguous uint64 array (see pack_hashes());
+        # the keyframes of snippet s start at row offsets[s]
+        self.library = pack_hashes(np.vstack(known_hashes))
+        self.offsets = np.concatenate(([0], np.cumsum(self.num_keyframes)[:-1]))
+
+        # Matching state (timestamps are POSIX seconds)
+        self.current_keyframe_index = np.zeros(num_snippets, dtype=np.intp)
+        self.current_keyframe_timestamp = np.full(num_snippets, np.nan)
+        self.start_snippet_timestamp = np.full(num_snippets, np.nan)
+        self.start_snippet_time = np.full(num_snippets, np.nan)
+        self.last_detection_timestamp = np.full(num_snippets, -np.inf)
+        self.consecutive_matches = np.zeros(num_snippets, dtype=np.intp)
+
+        # First keyframe of every snippet, packed the same way
+        self.first_hashes = self.library[self.offsets]
+
+    def all_in_cooldown(self, current_timestamp):
+        ts = current_timestamp.timestamp()
+        return bool(np.all(ts - self.last_detection_timestamp < self.cooldown))
+
+    def step(self, frame_hash, current_timestamp, current_time, fps, sample_fps):
+        """
+        Advances every snippet with the hash of one sampled frame.
+          :return: list of detections (snippet_index, start_time, end_time, start_timestamp, end_timestamp)
+        """
+        frame_hash = pack_hashes(frame_hash)
+
+        # Fast path: while no snippet is part-way through a match, every snippet is waiting for its
+        # first keyframe and nothing changes unless the frame is close to one of them
+        if not self.current_keyframe_index.any() and not self.consecutive_matches.any() \
+                and not np.any(hamming_distances(frame_hash, self.first_hashes) < self.match_threshold):
+            return []
+
+        ts = current_timestamp.timestamp()
+
+        # 1) Snippets still within their cooldown are left untouched
+        active = ~(ts - self.last_detection_timestamp < self.cooldown)
+
+        # 2) Multi-keyframe snippets that didn't find their next keyframe in time start over
+        expired = active & ~self.single_image & (self.current_keyframe_index > 0) \
+            & (ts - self.current_keyframe_timestamp > self.time_window)
+        self.current_keyframe_index[expired] = 0
+        self.current_keyframe_timestamp[expired] = np.nan
+        self.start_snippet_time[expired] = np.nan
+
+        # 3) Compare the frame with the keyframe each snippet is waiting for
+        expected_hashes = self.library[self.offsets + self.current_keyframe_index]
+        matched = active & (hamming_distances(frame_hash, expected_hashes) < self.match_threshold)
+
+        detections = []
+
+        # 4) Single images have to match for image_min_duration consecutive (sampled) frames
+        single = active & self.single_image
+        self.consecutive_matches[single & matched] += 1
+        self.consecutive_matches[single & ~matched] = 0
+        consecutive_match_time = self.consecutive_matches / sample_fps
+        for s in np.flatnonzero(single & (consecutive_match_time >= self.image_min_duration)):
+            match_time = consecutive_match_time[s]
+            self.last_detection_timestamp[s] = ts
+            self.consecutive_matches[s] = 0
+            detections.append((s, current_time - match_time, current_time,
+                               current_timestamp - timedelta(seconds=match_time), current_timestamp))
+
+        # 5) Multi-keyframe snippets move on to their next keyframe
+        advanced = matched & ~self.single_image
+        started = advanced & (self.current_keyframe_index == 0)
+        self.start_snippet_timestamp[started] = ts
+        self.start_snippet_time[started] = current_time
+        self.current_keyframe_index[advanced] += 1
+        self.current_keyframe_timestamp[advanced] = ts
+
+        # All keyframes matched
+        for s in np.flatnonzero(advanced & (self.current_keyframe_index == self.num_keyframes)):
+            start_time = self.start_snippet_time[s]
+            start_timestamp = current_timestamp - timedelta(seconds=ts - self.start_snippet_timestamp[s])
+            # This is a rough calc of snippet end time
+            duration = int(self.frame_paths[s][-1][-10:-4]) / fps
+            detections.append((s, start_time, start_time + duration,
+                               start_timestamp, start_timestamp + timedelta(seconds=duration)))
+
+            self.last_detection_timestamp[s] = ts
+            self.current_keyframe_index[s] = 0
+            self.current_keyframe_timestamp[s] = np.nan
+            self.start_snippet_time[s] = np.nan
+
+        detections.sort(key=lambda detection: detection[0])
+        return detections